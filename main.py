@@ -1,9 +1,20 @@
 import json
 import os
+import shutil
 import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Tuple
 
+from markupsafe import Markup
+from PIL import Image
+
+try:
+    from orjson import loads as _parse_json
+except ImportError:
+    _parse_json = json.loads
+
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.adb_controller import ADBController
@@ -12,7 +23,138 @@ from src.analyzers.quality_analyzer import ImageQualityAnalyzer
 from src.analyzers.sharpness_analyzer import SharpnessAnalyzer
 from src.analyzers.noise_analyzer import NoiseAnalyzer
 from src.analyzers.color_analyzer import ColorAnalyzer
+from src.pipeline import analyze_one, create_analysis_pool
 from src.report_generator import ReportGenerator
+from src.utils.image_bundle import ImageBundle
+
+
+CATEGORIES = ('quality', 'sharpness', 'noise', 'color')
+
+_QUALITY_NAMES = {
+    'brightness': '亮度',
+    'contrast': '对比度',
+    'saturation': '饱和度',
+    'tone_analysis': '影调分析'
+}
+
+_SHARPNESS_NAMES = {
+    'laplacian': '拉普拉斯方差',
+    'sobel': 'Sobel梯度',
+    'tenengrad': 'Tenengrad指标',
+    'fft_focus': 'FFT焦点'
+}
+
+_NOISE_NAMES = {
+    'noise_level': '噪声水平',
+    'psnr': '峰值信噪比',
+    'ssim': '结构相似性',
+    'snr': '信噪比'
+}
+
+_COLOR_NAMES = {
+    'white_balance': '白平衡',
+    'color_distribution': '色彩分布',
+    'color_temperature': '色温',
+    'color_cast': '色偏检测',
+    'dominant_colors': '主色调'
+}
+
+
+def _pass_rate(passed: int, total: int) -> float:
+    if total == 0:
+        return 0.0
+    return (passed / total) * 100
+
+
+_REPRESENTATIVE_METRICS = {'tone_analysis', 'white_balance', 'color_cast'}
+
+_DERIVED_LABELS = {
+    'color_temperature': lambda data: {'category': ColorAnalyzer._categorize_temperature(data['temperature'])}
+}
+
+
+def _aggregate_category(results: List[Dict]) -> Dict:
+    if len(results) == 1:
+        return results[0]
+    
+    merged = {}
+    for metric, first in results[0].items():
+        if not isinstance(first, dict):
+            merged[metric] = first
+            continue
+        
+        entries = [r[metric] for r in results]
+        data = dict(next((e for e in entries if not e.get('pass', True)), first))
+        if metric in _REPRESENTATIVE_METRICS:
+            merged[metric] = data
+            continue
+        
+        for key, value in first.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            mean = sum(e[key] for e in entries) / len(entries)
+            data[key] = int(round(mean)) if isinstance(value, int) else mean
+        if metric in _DERIVED_LABELS:
+            data.update(_DERIVED_LABELS[metric](data))
+        if 'pass' in first:
+            data['pass'] = all(e['pass'] for e in entries)
+        merged[metric] = data
+    
+    return merged
+
+
+def _value_details(data: Dict) -> List[Tuple[str, str]]:
+    return [
+        ('数值', Markup(f"{data.get('value', 0):.2f}")),
+        ('单位', data.get('unit', ''))
+    ]
+
+
+def _value_description_details(data: Dict) -> List[Tuple[str, str]]:
+    return _value_details(data) + [
+        ('说明', data.get('description', ''))
+    ]
+
+
+def _tone_details(data: Dict) -> List[Tuple[str, str]]:
+    details = [
+        ('高光占比', Markup(f"{data.get('highlight_ratio', 0):.2%}")),
+        ('阴影占比', Markup(f"{data.get('shadow_ratio', 0):.2%}"))
+    ]
+    if data.get('issues'):
+        details.append(('问题', ', '.join(data.get('issues', []))))
+    return details
+
+
+def _temperature_details(data: Dict) -> List[Tuple[str, str]]:
+    return [
+        ('色温', f"{data.get('temperature', 0)}K"),
+        ('类别', data.get('category', '未知'))
+    ]
+
+
+def _color_cast_details(data: Dict) -> List[Tuple[str, str]]:
+    return [
+        ('色偏类型', data.get('cast_type', '无')),
+        ('是否存在', Markup('是' if data.get('has_cast', False) else '否'))
+    ]
+
+
+def _dominant_colors_details(data: Dict) -> List[Tuple[str, str]]:
+    return [
+        ('主色调数量', Markup(data.get('k', 0)))
+    ]
+
+
+_QUALITY_DETAILS = {
+    'tone_analysis': _tone_details
+}
+
+_COLOR_DETAILS = {
+    'color_temperature': _temperature_details,
+    'color_cast': _color_cast_details,
+    'dominant_colors': _dominant_colors_details
+}
 
 
 class ImageTestAutomation:
@@ -25,12 +167,20 @@ class ImageTestAutomation:
         self.noise_analyzer = None
         self.color_analyzer = None
         self.report_generator = None
+        self.executor = None
+        self.analysis_pool = None
         self.test_results = {}
+        self._stats = None
         self.test_images = []
+        self.image_results = []
+        self._pending = []
+        self._pending_analysis = []
+        self.aggregate_images = self.config.get('analysis', {}).get('aggregate_images', False)
+        self.load_scale = self.config.get('analysis', {}).get('load_scale', 1)
 
     def _load_config(self, config_path: str) -> dict:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(config_path, 'rb') as f:
+            return _parse_json(f.read())
 
     def initialize(self):
         print("=" * 50)
@@ -61,6 +211,9 @@ class ImageTestAutomation:
         self.sharpness_analyzer = SharpnessAnalyzer(self.config)
         self.noise_analyzer = NoiseAnalyzer(self.config)
         self.color_analyzer = ColorAnalyzer(self.config)
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        if self.aggregate_images:
+            self.analysis_pool = create_analysis_pool(self.config)
         
         print("5. 初始化报告生成器...")
         self.report_generator = ReportGenerator(self.config)
@@ -80,12 +233,19 @@ class ImageTestAutomation:
         print("=" * 50)
         
         print(f"\n读取 {photo_count} 张照片进行分析...")
-        photos = self.camera.capture_multiple_photos(photo_count)
-        
-        for i, (path, name) in enumerate(photos, 1):
-            print(f"\n分析第 {i} 张照片: {name}")
-            self._analyze_image(path, name, i)
+        photos = self.camera.capture_photos_iter(photo_count)
         
+        try:
+            for i, (path, name) in enumerate(photos, 1):
+                print(f"\n分析第 {i} 张照片: {name}")
+                self._analyze_image(path, name)
+            self._collect_pending()
+        finally:
+            self.executor.shutdown()
+            if self.analysis_pool is not None:
+                self.analysis_pool.shutdown(cancel_futures=True)
+        
+        self._collect_results()
         self._generate_final_report()
         
         print("\n" + "=" * 50)
@@ -94,45 +254,97 @@ class ImageTestAutomation:
         
         return self.test_results
 
-    def _analyze_image(self, image_path: str, image_name: str, index: int):
-        if not os.path.exists(image_path) or os.path.getsize(image_path) == 0:
-            print(f"  ⚠ 跳过分析：文件不存在或为空")
+    def _analyze_image(self, image_path: str, image_name: str):
+        try:
+            st = os.stat(image_path)
+        except OSError:
+            print(f"  ⚠ 跳过分析：文件不存在")
+            return
+        if st.st_size == 0:
+            print(f"  ⚠ 跳过分析：文件为空")
+            return
+        
+        if self.test_images and not self.aggregate_images:
+            print(f"  - 仅记录图像（未开启 aggregate_images，只分析第一张）")
+            self.test_images.append({
+                'path': image_path,
+                'name': image_name,
+                'size': self._get_image_size(image_path)
+            })
+            return
+        
+        if self.analysis_pool is not None:
+            print(f"  - 已提交后台分析")
+            self._pending.append((image_path, image_name, self.analysis_pool.submit(analyze_one, image_path)))
+            return
+        
+        bundle = ImageBundle(image_path, self.load_scale)
+        try:
+            size = bundle.size
+        except ValueError:
+            print(f"  ⚠ 跳过分析：无法解码图像")
             return
         
         self.test_images.append({
             'path': image_path,
             'name': image_name,
-            'size': self._get_image_size(image_path)
+            'size': size
         })
         
         print(f"  - 图像质量分析...")
-        quality_results = self.quality_analyzer.analyze(image_path)
+        quality_future = self.executor.submit(self.quality_analyzer.analyze, bundle)
         
         print(f"  - 清晰度测试...")
-        sharpness_results = self.sharpness_analyzer.analyze(image_path)
+        sharpness_future = self.executor.submit(self.sharpness_analyzer.analyze, bundle)
         
         print(f"  - 噪声检测...")
-        noise_results = self.noise_analyzer.analyze(image_path)
+        noise_future = self.executor.submit(self.noise_analyzer.analyze, bundle)
         
         print(f"  - 色彩分析...")
-        color_results = self.color_analyzer.analyze(image_path)
+        color_future = self.executor.submit(self.color_analyzer.analyze, bundle)
+        
+        self._pending_analysis.append({
+            'quality': quality_future,
+            'sharpness': sharpness_future,
+            'noise': noise_future,
+            'color': color_future
+        })
+
+    def _collect_pending(self):
+        analyses, self._pending_analysis = self._pending_analysis, []
+        for futures in analyses:
+            self.image_results.append({category: future.result() for category, future in futures.items()})
+        
+        pending, self._pending = self._pending, []
+        for image_path, image_name, future in pending:
+            try:
+                size, results = future.result()
+            except ValueError:
+                print(f"  ⚠ 跳过分析：无法解码图像 ({image_name})")
+                continue
+            
+            self.test_images.append({
+                'path': image_path,
+                'name': image_name,
+                'size': size
+            })
+            self.image_results.append(results)
+
+    def _collect_results(self):
+        if not self.image_results:
+            return
         
-        if index == 1:
-            self.test_results['quality'] = quality_results
-            self.test_results['sharpness'] = sharpness_results
-            self.test_results['noise'] = noise_results
-            self.test_results['color'] = color_results
+        for cat in CATEGORIES:
+            self.test_results[cat] = _aggregate_category([r[cat] for r in self.image_results])
+        self._stats = None
 
     def _get_image_size(self, image_path: str) -> str:
         try:
-            import cv2
-            img = cv2.imread(image_path)
-            if img is not None:
-                h, w = img.shape[:2]
+            with Image.open(image_path) as img:
+                w, h = img.size
                 return f"{w}x{h}"
-        except:
-            pass
-        return "Unknown"
+        except (OSError, ValueError):
+            return "Unknown"
 
     def _generate_final_report(self):
         print("\n生成测试报告...")
@@ -145,25 +357,23 @@ class ImageTestAutomation:
             original_path = img['path']
             img_name = img['name']
             
-            if os.path.exists(original_path):
-                dest_path = os.path.join(reports_dir, img_name)
-                import shutil
-                try:
-                    shutil.copy2(original_path, dest_path)
-                    processed_images.append({
-                        'path': img_name,
-                        'name': img_name,
-                        'size': img['size']
-                    })
-                    print(f"  已复制图片: {img_name}")
-                except Exception as e:
-                    print(f"  复制图片失败 {img_name}: {e}")
-                    processed_images.append({
-                        'path': original_path,
-                        'name': img_name,
-                        'size': img['size']
-                    })
-            else:
+            dest_path = os.path.join(reports_dir, img_name)
+            try:
+                self._link_or_copy(original_path, dest_path)
+                processed_images.append({
+                    'path': img_name,
+                    'name': img_name,
+                    'size': img['size']
+                })
+                print(f"  已复制图片: {img_name}")
+            except FileNotFoundError:
+                processed_images.append({
+                    'path': original_path,
+                    'name': img_name,
+                    'size': img['size']
+                })
+            except Exception as e:
+                print(f"  复制图片失败 {img_name}: {e}")
                 processed_images.append({
                     'path': original_path,
                     'name': img_name,
@@ -177,220 +387,78 @@ class ImageTestAutomation:
             'sharpness_tests': self._format_sharpness_tests(),
             'noise_tests': self._format_noise_tests(),
             'color_tests': self._format_color_tests(),
-            'quality_pass_count': self._count_pass_tests('quality'),
-            'quality_total_count': self._count_total_tests('quality'),
-            'quality_pass_rate': self._calculate_pass_rate('quality'),
-            'sharpness_pass_count': self._count_pass_tests('sharpness'),
-            'sharpness_total_count': self._count_total_tests('sharpness'),
-            'sharpness_pass_rate': self._calculate_pass_rate('sharpness'),
-            'noise_pass_count': self._count_pass_tests('noise'),
-            'noise_total_count': self._count_total_tests('noise'),
-            'noise_pass_rate': self._calculate_pass_rate('noise'),
-            'color_pass_count': self._count_pass_tests('color'),
-            'color_total_count': self._count_total_tests('color'),
-            'color_pass_rate': self._calculate_pass_rate('color'),
-            'total_tests': self._count_total_tests_all(),
-            'passed_tests': self._count_passed_tests_all(),
-            'pass_rate': self._calculate_pass_rate_all(),
             'recommendations': self._generate_recommendations()
         }
         
-        report_path = self.report_generator.generate_report(report_data)
-        print(f"报告已保存: {report_path}")
-
-    def _format_quality_tests(self) -> List[Dict]:
-        quality = self.test_results.get('quality', {})
-        tests = []
+        stats = self._compute_stats()
+        for cat in CATEGORIES:
+            passed, total = stats[cat]
+            report_data[f'{cat}_pass_count'] = passed
+            report_data[f'{cat}_total_count'] = total
+            report_data[f'{cat}_pass_rate'] = _pass_rate(passed, total)
         
-        metric_names = {
-            'brightness': '亮度',
-            'contrast': '对比度',
-            'saturation': '饱和度',
-            'tone_analysis': '影调分析'
-        }
+        passed_all = sum(passed for passed, _ in stats.values())
+        total_all = sum(total for _, total in stats.values())
+        report_data['total_tests'] = total_all
+        report_data['passed_tests'] = passed_all
+        report_data['pass_rate'] = _pass_rate(passed_all, total_all)
         
-        for metric, data in quality.items():
-            if isinstance(data, dict) and 'pass' in data:
-                test = {
-                    'name': metric_names.get(metric, metric),
-                    'pass': data['pass'],
-                    'description': data.get('description', ''),
-                    'details': []
-                }
-                
-                if metric == 'tone_analysis':
-                    test['details'].append({
-                        'label': '高光占比',
-                        'value': f"{data.get('highlight_ratio', 0):.2%}"
-                    })
-                    test['details'].append({
-                        'label': '阴影占比',
-                        'value': f"{data.get('shadow_ratio', 0):.2%}"
-                    })
-                    if data.get('issues'):
-                        test['details'].append({
-                            'label': '问题',
-                            'value': ', '.join(data.get('issues', []))
-                        })
-                else:
-                    test['details'].append({
-                        'label': '数值',
-                        'value': f"{data.get('value', 0):.2f}"
-                    })
-                    test['details'].append({
-                        'label': '单位',
-                        'value': data.get('unit', '')
-                    })
-                
-                tests.append(test)
-        
-        return tests
+        report_path = self.report_generator.generate_report(report_data)
+        print(f"报告已保存: {report_path}")
 
-    def _format_sharpness_tests(self) -> List[Dict]:
-        sharpness = self.test_results.get('sharpness', {})
-        tests = []
-        
-        metric_names = {
-            'laplacian': '拉普拉斯方差',
-            'sobel': 'Sobel梯度',
-            'tenengrad': 'Tenengrad指标',
-            'fft_focus': 'FFT焦点'
-        }
-        
-        for metric, data in sharpness.items():
-            if isinstance(data, dict) and 'pass' in data:
-                tests.append({
-                    'name': metric_names.get(metric, metric),
-                    'pass': data['pass'],
-                    'description': data.get('description', ''),
-                    'details': [
-                        {'label': '数值', 'value': f"{data.get('value', 0):.2f}"},
-                        {'label': '单位', 'value': data.get('unit', '')},
-                        {'label': '说明', 'value': data.get('description', '')}
-                    ]
-                })
-        
-        return tests
+    def _link_or_copy(self, src: str, dest: str):
+        try:
+            os.link(src, dest)
+        except FileExistsError:
+            if os.path.samefile(src, dest):
+                return
+            os.remove(dest)
+            self._link_or_copy(src, dest)
+        except OSError:
+            shutil.copyfile(src, dest)
 
-    def _format_noise_tests(self) -> List[Dict]:
-        noise = self.test_results.get('noise', {})
+    def _format_tests(self, results: Dict, names: Dict[str, str],
+                      handlers: Dict = None, default_details=_value_details) -> List[Dict]:
+        handlers = handlers or {}
         tests = []
         
-        metric_names = {
-            'noise_level': '噪声水平',
-            'psnr': '峰值信噪比',
-            'ssim': '结构相似性',
-            'snr': '信噪比'
-        }
-        
-        for metric, data in noise.items():
+        for metric, data in results.items():
             if isinstance(data, dict) and 'pass' in data:
+                details = handlers.get(metric, default_details)
                 tests.append({
-                    'name': metric_names.get(metric, metric),
+                    'name': names.get(metric, metric),
                     'pass': data['pass'],
                     'description': data.get('description', ''),
-                    'details': [
-                        {'label': '数值', 'value': f"{data.get('value', 0):.2f}"},
-                        {'label': '单位', 'value': data.get('unit', '')},
-                        {'label': '说明', 'value': data.get('description', '')}
-                    ]
+                    'details': details(data)
                 })
         
         return tests
 
-    def _format_color_tests(self) -> List[Dict]:
-        color = self.test_results.get('color', {})
-        tests = []
-        
-        metric_names = {
-            'white_balance': '白平衡',
-            'color_distribution': '色彩分布',
-            'color_temperature': '色温',
-            'color_cast': '色偏检测',
-            'dominant_colors': '主色调'
-        }
-        
-        for metric, data in color.items():
-            if isinstance(data, dict) and 'pass' in data:
-                test = {
-                    'name': metric_names.get(metric, metric),
-                    'pass': data['pass'],
-                    'description': data.get('description', ''),
-                    'details': []
-                }
-                
-                if metric == 'color_temperature':
-                    test['details'].append({
-                        'label': '色温',
-                        'value': f"{data.get('temperature', 0)}K"
-                    })
-                    test['details'].append({
-                        'label': '类别',
-                        'value': data.get('category', '未知')
-                    })
-                elif metric == 'color_cast':
-                    test['details'].append({
-                        'label': '色偏类型',
-                        'value': data.get('cast_type', '无')
-                    })
-                    test['details'].append({
-                        'label': '是否存在',
-                        'value': '是' if data.get('has_cast', False) else '否'
-                    })
-                elif metric == 'dominant_colors':
-                    test['details'].append({
-                        'label': '主色调数量',
-                        'value': str(data.get('k', 0))
-                    })
-                else:
-                    test['details'].append({
-                        'label': '数值',
-                        'value': f"{data.get('value', 0):.2f}"
-                    })
-                    test['details'].append({
-                        'label': '单位',
-                        'value': data.get('unit', '')
-                    })
-                
-                tests.append(test)
-        
-        return tests
-
-    def _count_pass_tests(self, category: str) -> int:
-        category_data = self.test_results.get(category, {})
-        count = 0
-        for data in category_data.values():
-            if isinstance(data, dict) and data.get('pass', False):
-                count += 1
-        return count
-
-    def _count_total_tests(self, category: str) -> int:
-        category_data = self.test_results.get(category, {})
-        count = 0
-        for data in category_data.values():
-            if isinstance(data, dict) and 'pass' in data:
-                count += 1
-        return count
+    def _format_quality_tests(self) -> List[Dict]:
+        return self._format_tests(self.test_results.get('quality', {}), _QUALITY_NAMES,
+                                  _QUALITY_DETAILS)
 
-    def _calculate_pass_rate(self, category: str) -> float:
-        total = self._count_total_tests(category)
-        passed = self._count_pass_tests(category)
-        if total == 0:
-            return 0.0
-        return (passed / total) * 100
+    def _format_sharpness_tests(self) -> List[Dict]:
+        return self._format_tests(self.test_results.get('sharpness', {}), _SHARPNESS_NAMES,
+                                  default_details=_value_description_details)
 
-    def _count_total_tests_all(self) -> int:
-        return sum([self._count_total_tests(cat) for cat in ['quality', 'sharpness', 'noise', 'color']])
+    def _format_noise_tests(self) -> List[Dict]:
+        return self._format_tests(self.test_results.get('noise', {}), _NOISE_NAMES,
+                                  default_details=_value_description_details)
 
-    def _count_passed_tests_all(self) -> int:
-        return sum([self._count_pass_tests(cat) for cat in ['quality', 'sharpness', 'noise', 'color']])
+    def _format_color_tests(self) -> List[Dict]:
+        return self._format_tests(self.test_results.get('color', {}), _COLOR_NAMES,
+                                  _COLOR_DETAILS)
 
-    def _calculate_pass_rate_all(self) -> float:
-        total = self._count_total_tests_all()
-        passed = self._count_passed_tests_all()
-        if total == 0:
-            return 0.0
-        return (passed / total) * 100
+    def _compute_stats(self) -> Dict[str, Tuple[int, int]]:
+        if self._stats is None:
+            stats = {}
+            for cat in CATEGORIES:
+                flags = [bool(data['pass']) for data in self.test_results.get(cat, {}).values()
+                         if isinstance(data, dict) and 'pass' in data]
+                stats[cat] = (sum(flags), len(flags))
+            self._stats = stats
+        return self._stats
 
     def _generate_recommendations(self) -> List[str]:
         analysis = self.test_results
@@ -428,6 +496,7 @@ class ImageTestAutomation:
 
 
 def main():
+    automation = None
     try:
         automation = ImageTestAutomation()
         automation.initialize()
@@ -441,8 +510,10 @@ def main():
         print("\n\n测试已取消")
     except Exception as e:
         print(f"\n错误: {e}")
-        import traceback
         traceback.print_exc()
+    finally:
+        if automation is not None and automation.adb is not None:
+            automation.adb.close()
 
 
 if __name__ == "__main__":
@@ -1,15 +1,32 @@
 import subprocess
 import json
 import os
-from typing import Optional, List
+import queue
+import shlex
+import threading
+from operator import itemgetter
+from typing import Iterator, Optional, List
 import time
 
 
+DEVICE_INFO_PROPS = {
+    'ro.product.model': 'model',
+    'ro.build.version.release': 'android_version',
+    'ro.product.manufacturer': 'manufacturer'
+}
+
+SHELL_END_MARKER = '__ADB_SHELL_END__'
+
+
 class ADBController:
     def __init__(self, adb_path: str = "", device_id: str = "", timeout: int = 30):
         self.adb_path = adb_path
         self.device_id = device_id
         self.timeout = timeout
+        self._shell = None
+        self._shell_queue = None
+        self._shell_status = None
+        self._adb_cmd = self._get_adb_command()
         self._check_adb_available()
 
     def _get_adb_command(self) -> str:
@@ -19,8 +36,7 @@ class ADBController:
 
     def _check_adb_available(self):
         try:
-            adb_cmd = self._get_adb_command()
-            result = subprocess.run([adb_cmd, 'version'], 
+            result = subprocess.run([self._adb_cmd, 'version'], 
                                   capture_output=True, 
                                   text=True, 
                                   timeout=5)
@@ -31,13 +47,14 @@ class ADBController:
         except subprocess.TimeoutExpired:
             raise RuntimeError("ADB command timed out")
 
+    def _build_command(self, command: List[str]) -> List[str]:
+        if self.device_id:
+            return [self._adb_cmd, '-s', self.device_id] + command
+        return [self._adb_cmd] + command
+
     def _run_command(self, command: List[str]) -> tuple[bool, str]:
         try:
-            adb_cmd = self._get_adb_command()
-            if self.device_id:
-                command = [adb_cmd, '-s', self.device_id] + command
-            else:
-                command = [adb_cmd] + command
+            command = self._build_command(command)
             
             result = subprocess.run(command, 
                                   capture_output=True, 
@@ -49,6 +66,114 @@ class ADBController:
         except Exception as e:
             return False, str(e)
 
+    def _open_shell(self):
+        self.close()
+        try:
+            shell = subprocess.Popen(self._build_command(['shell']),
+                                     stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL,
+                                     text=True,
+                                     encoding='utf-8',
+                                     errors='replace',
+                                     bufsize=1)
+        except OSError:
+            return
+        
+        lines = queue.Queue()
+        reader = threading.Thread(target=self._pump_shell_output,
+                                  args=(shell.stdout, lines),
+                                  daemon=True)
+        reader.start()
+        self._shell = shell
+        self._shell_queue = lines
+
+    @staticmethod
+    def _pump_shell_output(stream, lines: queue.Queue):
+        for line in iter(stream.readline, ''):
+            lines.put(line)
+        lines.put(None)
+
+    def _write_shell(self, cmd: str) -> bool:
+        shell = self._shell
+        if shell is None or shell.poll() is not None:
+            return False
+        
+        try:
+            shell.stdin.write(f"( {cmd} ) </dev/null 2>&1; __rc=$?; "
+                              f"echo; echo {SHELL_END_MARKER}$__rc\n")
+            shell.stdin.flush()
+            return True
+        except (OSError, ValueError):
+            self.close()
+            return False
+
+    def _read_shell(self) -> Iterator[str]:
+        self._shell_status = None
+        deadline = time.monotonic() + self.timeout
+        pending = None
+        try:
+            while True:
+                try:
+                    line = self._shell_queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    self.close()
+                    return
+                
+                if line is None or line.startswith(SHELL_END_MARKER):
+                    if line is None:
+                        self.close()
+                    else:
+                        self._shell_status = line[len(SHELL_END_MARKER):].strip() == '0'
+                    if pending:
+                        yield pending
+                    return
+                
+                if pending is not None:
+                    yield pending
+                pending = line.rstrip('\n')
+        finally:
+            if self._shell_status is None and self._shell is not None:
+                for _ in self._read_shell():
+                    pass
+
+    def _shell_lines(self, cmd: str) -> Iterator[str]:
+        if not self._write_shell(cmd):
+            success, output = self._run_command(['shell', cmd])
+            yield from output.splitlines()
+            return
+        
+        yield from self._read_shell()
+
+    def _shell_exec(self, cmd: str) -> tuple[bool, str]:
+        if not self._write_shell(cmd):
+            return self._run_command(['shell', cmd])
+        
+        output = '\n'.join(self._read_shell())
+        if self._shell_status is None:
+            return False, output or f"Command timed out: {cmd}"
+        return self._shell_status, output
+
+    def _shell_query(self, cmd: str) -> str:
+        success, output = self._shell_exec(cmd)
+        return output if success else ''
+
+    def close(self):
+        shell, self._shell = self._shell, None
+        self._shell_queue = None
+        if shell is None:
+            return
+        
+        try:
+            shell.stdin.close()
+        except OSError:
+            pass
+        try:
+            shell.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            shell.kill()
+            shell.wait()
+
     def get_devices(self) -> List[str]:
         success, output = self._run_command(['devices'])
         if not success:
@@ -75,24 +200,20 @@ class ADBController:
         success, output = self._run_command(['get-state'])
         if success and 'device' in output:
             print(f"Connected to device: {self.device_id}")
+            self._open_shell()
             return True
         else:
             raise RuntimeError(f"Failed to connect to device {self.device_id}: {output}")
 
     def get_device_info(self) -> dict:
         info = {}
-        
-        success, output = self._run_command(['shell', 'getprop', 'ro.product.model'])
-        if success:
-            info['model'] = output.strip()
-        
-        success, output = self._run_command(['shell', 'getprop', 'ro.build.version.release'])
-        if success:
-            info['android_version'] = output.strip()
-        
-        success, output = self._run_command(['shell', 'getprop', 'ro.product.manufacturer'])
-        if success:
-            info['manufacturer'] = output.strip()
+        for line in self._shell_query('getprop').splitlines():
+            key, sep, value = line.strip().partition(']: [')
+            if not sep:
+                continue
+            name = DEVICE_INFO_PROPS.get(key.lstrip('['))
+            if name:
+                info[name] = value.rstrip(']').strip()
         
         return info
 
@@ -124,6 +245,15 @@ class ADBController:
             raise RuntimeError(f"Failed to pull file: {output}")
         return True
 
+    def pull_files(self, remote_paths: List[str], local_dir: str) -> List[str]:
+        if not remote_paths:
+            return []
+        
+        success, output = self._run_command(['pull'] + list(remote_paths) + [local_dir])
+        if not success:
+            raise RuntimeError(f"Failed to pull files: {output}")
+        return [os.path.join(local_dir, path.rpartition('/')[2]) for path in remote_paths]
+
     def push_file(self, local_path: str, remote_path: str) -> bool:
         success, output = self._run_command(['push', local_path, remote_path])
         if not success:
@@ -131,81 +261,67 @@ class ADBController:
         return True
 
     def list_files(self, path: str = "/sdcard/DCIM/Camera/") -> List[str]:
-        success, output = self._run_command(['shell', 'ls', '-lt', path])
-        if not success:
-            return []
-        
+        prefix = path if path.endswith('/') else path + '/'
         files = []
-        for line in output.strip().split('\n'):
+        for line in self._shell_lines(f'ls -lt {shlex.quote(path)}'):
             if line and not line.startswith('.'):
                 parts = line.split()
                 if len(parts) >= 9:
-                    filename = parts[8]
-                    full_path = os.path.join(path, filename)
-                    files.append(full_path)
+                    files.append(prefix + parts[8])
         
         return files
 
     def list_files_with_time(self, path: str = "/sdcard/DCIM/Camera/") -> List[dict]:
         print(f"\n尝试获取文件列表，路径: {path}")
         
-        success, output = self._run_command(['shell', 'ls', '-l', path])
-        if not success:
-            print(f"警告：无法列出文件: {output}")
-            return []
-        
-        print(f"ADB输出:\n{output}")
+        find_cmd = (f"find {shlex.quote(path)} -maxdepth 1 -type f "
+                    r"\( -iname '*.jpg' -o -iname '*.jpeg' -o -iname '*.png' \) "
+                    r"-printf '%T@\t%p\n'")
         
         files = []
-        lines = output.strip().split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('total') or line.startswith('.'):
-                continue
-            
-            parts = line.split()
-            if len(parts) < 1:
+        errors = []
+        for line in self._shell_lines(find_cmd):
+            mtime, sep, full_path = line.partition('\t')
+            try:
+                mtime = float(mtime) if sep else None
+            except ValueError:
+                mtime = None
+            if mtime is None:
+                if line:
+                    errors.append(line)
                 continue
             
-            filename = parts[-1]
-            
-            if not filename.lower().endswith(('.jpg', '.jpeg', '.png')):
-                print(f"  跳过非图片文件: {filename}")
-                continue
-            
-            full_path = os.path.join(path, filename)
-            
-            timestamp = 'Unknown'
-            if len(parts) >= 8:
-                try:
-                    date_str = f"{parts[5]}-{parts[6]}-{parts[7]}"
-                    timestamp = f"{date_str} {parts[3]}:{parts[4]}"
-                except:
-                    pass
-            
+            filename = full_path.rpartition('/')[2]
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(mtime))
             files.append({
                 'path': full_path,
                 'name': filename,
-                'timestamp': timestamp
+                'timestamp': timestamp,
+                'mtime': mtime
             })
             print(f"  添加文件: {filename} (时间: {timestamp})")
         
+        if not files and errors:
+            message = '\n'.join(errors)
+            print(f"警告：无法列出文件: {message}")
+            return []
+        
         if files:
             print(f"\n  找到 {len(files)} 个图片文件")
         else:
             print(f"\n  路径 {path} 中没有找到图片文件")
         
-        return sorted(files, key=lambda x: x['timestamp'], reverse=True)
+        return sorted(files, key=itemgetter('mtime'), reverse=True)
 
     def get_latest_photo(self, path: str = "/sdcard/DCIM/Camera/") -> Optional[str]:
-        files = self.list_files(path)
-        if files:
-            return files[0]
-        return None
+        name = self._shell_query(f'ls -t {shlex.quote(path)} 2>/dev/null | head -n 1').strip()
+        if not name:
+            return None
+        prefix = path if path.endswith('/') else path + '/'
+        return prefix + name
 
     def delete_file(self, remote_path: str) -> bool:
-        success, output = self._run_command(['shell', 'rm', remote_path])
+        success, output = self._shell_exec(f'rm {shlex.quote(remote_path)}')
         return success
 
     def screen_capture(self, local_path: str) -> bool:
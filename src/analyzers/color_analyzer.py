@@ -1,23 +1,34 @@
 import cv2
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Union
+
+from ..utils.image_bundle import ImageBundle
+
+
+TEMPERATURE_RATIO_BINS = np.array([0.6, 0.8, 1.0, 1.2, 1.5])
+TEMPERATURE_VALUES = np.array([10000, 8000, 6500, 5000, 4000, 3000])
+
+TEMPERATURE_CATEGORY_BINS = np.array([4000, 5000, 6500, 8000])
+TEMPERATURE_CATEGORIES = ('暖色（黄/橙）', '中性暖', '中性', '中性冷', '冷色（蓝）')
 
 
 class ColorAnalyzer:
     def __init__(self, config: dict):
         self.config = config
         self.thresholds = config.get('analysis', {})
+        self.load_scale = self.thresholds.get('load_scale', 1)
+        self.analysis_scale = self.thresholds.get('analysis_scale', 0.5)
 
-    def analyze(self, image_path: str) -> Dict:
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Failed to load image: {image_path}")
+    def analyze(self, bundle: Union[str, ImageBundle]) -> Dict:
+        bundle = ImageBundle.wrap(bundle, self.load_scale)
+        image = bundle.image
+        small = bundle.scaled(self.analysis_scale)
         
         results = {
-            'white_balance': self._analyze_white_balance(image),
-            'color_distribution': self._analyze_color_distribution(image),
-            'color_temperature': self._estimate_color_temperature(image),
-            'color_cast': self._detect_color_cast(image),
+            'white_balance': self._analyze_white_balance(small.image),
+            'color_distribution': self._analyze_color_distribution(bundle.hsv),
+            'color_temperature': self._estimate_color_temperature(small.image),
+            'color_cast': self._detect_color_cast(image, bundle.gray),
             'dominant_colors': self._find_dominant_colors(image)
         }
         
@@ -31,9 +42,7 @@ class ColorAnalyzer:
         
         center_crop = image[h//4:3*h//4, w//4:3*w//4]
         
-        mean_r = np.mean(center_crop[:, :, 2])
-        mean_g = np.mean(center_crop[:, :, 1])
-        mean_b = np.mean(center_crop[:, :, 0])
+        mean_b, mean_g, mean_r, _ = cv2.mean(center_crop)
         
         max_channel = max(mean_r, mean_g, mean_b)
         min_channel = min(mean_r, mean_g, mean_b)
@@ -50,20 +59,17 @@ class ColorAnalyzer:
             'description': '白平衡分析 - 各通道平衡时为良好'
         }
     
-    def _analyze_color_distribution(self, image: np.ndarray) -> Dict:
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-        
-        h_hist = cv2.calcHist([hsv], [0], None, [180], [0, 180])
-        s_hist = cv2.calcHist([hsv], [1], None, [256], [0, 256])
-        v_hist = cv2.calcHist([hsv], [2], None, [256], [0, 256])
-        
-        h_hist = h_hist.flatten().tolist()
-        s_hist = s_hist.flatten().tolist()
-        v_hist = v_hist.flatten().tolist()
-        
+    def _analyze_color_distribution(self, hsv: np.ndarray) -> Dict:
+        h, s, v = cv2.split(hsv)
+        h_hist = np.bincount(h.ravel(), minlength=180)
+        s_hist = np.bincount(s.ravel(), minlength=256)
+        v_hist = np.bincount(v.ravel(), minlength=256)
+        
+        levels = np.arange(256)
+        total = max(int(h.size), 1)
         dominant_hue = np.argmax(h_hist)
-        mean_saturation = np.mean(hsv[:, :, 1])
-        mean_value = np.mean(hsv[:, :, 2])
+        mean_saturation = (s_hist @ levels) / total
+        mean_value = (v_hist @ levels) / total
         
         return {
             'hue_histogram': h_hist,
@@ -80,27 +86,13 @@ class ColorAnalyzer:
         
         center_crop = image[h//4:3*h//4, w//4:3*w//4]
         
-        mean_r = np.mean(center_crop[:, :, 2])
-        mean_g = np.mean(center_crop[:, :, 1])
-        mean_b = np.mean(center_crop[:, :, 0])
+        mean_b, mean_g, mean_r, _ = cv2.mean(center_crop)
         
         if mean_r + mean_b == 0:
             temperature = 6500
         else:
             ratio = mean_r / (mean_b + 1e-10)
-            
-            if ratio > 1.5:
-                temperature = 3000
-            elif ratio > 1.2:
-                temperature = 4000
-            elif ratio > 1.0:
-                temperature = 5000
-            elif ratio > 0.8:
-                temperature = 6500
-            elif ratio > 0.6:
-                temperature = 8000
-            else:
-                temperature = 10000
+            temperature = self._temperature_from_ratio(ratio)
         
         temp_category = self._categorize_temperature(temperature)
         
@@ -110,28 +102,16 @@ class ColorAnalyzer:
             'description': '估计色温 - 单位：开尔文'
         }
     
-    def _categorize_temperature(self, temp: int) -> str:
-        if temp < 4000:
-            return '暖色（黄/橙）'
-        elif temp < 5000:
-            return '中性暖'
-        elif temp < 6500:
-            return '中性'
-        elif temp < 8000:
-            return '中性冷'
-        else:
-            return '冷色（蓝）'
+    def _temperature_from_ratio(self, ratio):
+        return TEMPERATURE_VALUES[np.searchsorted(TEMPERATURE_RATIO_BINS, ratio, side='left')]
     
-    def _detect_color_cast(self, image: np.ndarray) -> Dict:
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        diff_r = cv2.absdiff(gray, image[:, :, 2])
-        diff_g = cv2.absdiff(gray, image[:, :, 1])
-        diff_b = cv2.absdiff(gray, image[:, :, 0])
-        
-        mean_diff_r = np.mean(diff_r)
-        mean_diff_g = np.mean(diff_g)
-        mean_diff_b = np.mean(diff_b)
+    @staticmethod
+    def _categorize_temperature(temp: int) -> str:
+        return TEMPERATURE_CATEGORIES[int(np.searchsorted(TEMPERATURE_CATEGORY_BINS, temp, side='right'))]
+    
+    def _detect_color_cast(self, image: np.ndarray, gray: np.ndarray) -> Dict:
+        diff = cv2.absdiff(image, cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+        mean_diff_b, mean_diff_g, mean_diff_r, _ = cv2.mean(diff)
         
         diffs = [mean_diff_r, mean_diff_g, mean_diff_b]
         max_diff = max(diffs)
@@ -158,17 +138,24 @@ class ColorAnalyzer:
             'description': '色偏检测 - 检测图像是否存在颜色倾向'
         }
 
-    def _find_dominant_colors(self, image: np.ndarray, k: int = 5) -> Dict:
-        pixels = image.reshape(-1, 3).astype(np.float32)
+    def _find_dominant_colors(self, image: np.ndarray, k: int = 5, sample_size: int = 20000) -> Dict:
+        pixels = image.reshape(-1, 3)
         
-        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
-        _, labels, centers = cv2.kmeans(pixels, k, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
+        if len(pixels) > sample_size:
+            indices = np.random.default_rng(0).integers(0, len(pixels), sample_size)
+            samples = pixels[indices].astype(np.float32)
+        else:
+            samples = pixels.astype(np.float32)
         
-        centers = np.uint8(centers)
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
+        _, _, centers = cv2.kmeans(samples, k, None, criteria, 1, cv2.KMEANS_PP_CENTERS)
         
-        counts = np.bincount(labels.flatten())
+        labels = self._nearest_centers(pixels, centers)
+        counts = np.bincount(labels, minlength=k)
         percentages = (counts / len(labels)) * 100
         
+        centers = np.uint8(centers)
+        
         dominant_colors = []
         for i in range(k):
             color = {
@@ -186,10 +173,20 @@ class ColorAnalyzer:
             'description': f'前{k}个主色调'
         }
     
-    def calculate_color_accuracy(self, image_path: str, reference_colors: List[Dict]) -> Dict:
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Failed to load image: {image_path}")
+    def _nearest_centers(self, pixels: np.ndarray, centers: np.ndarray, chunk_size: int = 1 << 18) -> np.ndarray:
+        center_norms = (centers ** 2).sum(axis=1)
+        labels = np.empty(len(pixels), dtype=np.intp)
+        
+        for start in range(0, len(pixels), chunk_size):
+            block = pixels[start:start + chunk_size].astype(np.float32)
+            distances = center_norms - 2 * (block @ centers.T)
+            labels[start:start + chunk_size] = distances.argmin(axis=1)
+        
+        return labels
+    
+    def calculate_color_accuracy(self, bundle: Union[str, ImageBundle], reference_colors: List[Dict]) -> Dict:
+        bundle = ImageBundle.wrap(bundle, self.load_scale)
+        image = bundle.image
         
         h, w = image.shape[:2]
         
@@ -197,7 +194,7 @@ class ColorAnalyzer:
         for ref_color in reference_colors:
             x = int(ref_color['x'] * w)
             y = int(ref_color['y'] * h)
-            radius = int(ref_color.get('radius', 10))
+            radius = max(1, int(ref_color.get('radius', 10)) // bundle.load_scale)
             
             mask = np.zeros((h, w), dtype=np.uint8)
             cv2.circle(mask, (x, y), radius, 255, -1)
@@ -225,36 +222,8 @@ class ColorAnalyzer:
         }
 
     def _calculate_delta_e(self, color1: np.ndarray, color2: np.ndarray) -> float:
-        def rgb_to_lab(rgb):
-            rgb = np.array(rgb) / 255.0
-            
-            mask = rgb > 0.04045
-            rgb[mask] = ((rgb[mask] + 0.055) / 1.055) ** 2.4
-            rgb[~mask] = rgb[~mask] / 12.92
-            
-            rgb = rgb * 100
-            
-            xyz = np.zeros(3)
-            xyz[0] = rgb[0] * 0.4124 + rgb[1] * 0.3576 + rgb[2] * 0.1805
-            xyz[1] = rgb[0] * 0.2126 + rgb[1] * 0.7152 + rgb[2] * 0.0722
-            xyz[2] = rgb[0] * 0.0193 + rgb[1] * 0.1192 + rgb[2] * 0.9505
-            
-            xyz[0] /= 95.047
-            xyz[1] /= 100.000
-            xyz[2] /= 108.883
-            
-            xyz = np.where(xyz > 0.008856, xyz ** (1/3), 7.787 * xyz + 16/116)
-            
-            lab = np.zeros(3)
-            lab[0] = 116 * xyz[1] - 16
-            lab[1] = 500 * (xyz[0] - xyz[1])
-            lab[2] = 200 * (xyz[1] - xyz[2])
-            
-            return lab
-        
-        lab1 = rgb_to_lab(color1)
-        lab2 = rgb_to_lab(color2)
-        
-        delta_e = np.sqrt(np.sum((lab1 - lab2) ** 2))
+        colors = np.array([[color1, color2]], dtype=np.float32)
+        colors /= 255.0
+        lab = cv2.cvtColor(colors, cv2.COLOR_BGR2Lab)[0]
         
-        return delta_e
+        return float(np.linalg.norm(lab[0] - lab[1]))
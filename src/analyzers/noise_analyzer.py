@@ -1,19 +1,20 @@
 import cv2
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, Tuple, Union
+
+from ..utils.buffer_pool import BufferPool
+from ..utils.image_bundle import ImageBundle
 
 
 class NoiseAnalyzer:
     def __init__(self, config: dict):
         self.config = config
         self.thresholds = config.get('analysis', {})
+        self.load_scale = self.thresholds.get('load_scale', 1)
+        self._buffers = BufferPool()
 
-    def analyze(self, image_path: str) -> Dict:
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Failed to load image: {image_path}")
-        
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    def analyze(self, bundle: Union[str, ImageBundle]) -> Dict:
+        gray = ImageBundle.wrap(bundle, self.load_scale).gray
         
         results = {
             'noise_level': self._estimate_noise_level(gray),
@@ -37,13 +38,14 @@ class NoiseAnalyzer:
         if h < 2 or w < 2:
             return {'value': 0.0, 'unit': 'Standard deviation', 'description': 'Noise level'}
         
-        noise_map = np.zeros_like(gray, dtype=np.float32)
+        gray_f = self._buffers.get('gray', gray.shape)
+        np.copyto(gray_f, gray)
+        local_mean = cv2.boxFilter(gray_f, cv2.CV_32F, (3, 3), dst=self._buffers.get('local_mean', gray.shape),
+                                   borderType=cv2.BORDER_REFLECT)
         
-        for i in range(1, h - 1):
-            for j in range(1, w - 1):
-                neighbors = gray[i-1:i+2, j-1:j+2]
-                local_mean = np.mean(neighbors)
-                noise_map[i, j] = np.abs(gray[i, j] - local_mean)
+        noise_map = cv2.absdiff(gray_f, local_mean, dst=local_mean)
+        noise_map[[0, -1], :] = 0
+        noise_map[:, [0, -1]] = 0
         
         noise_level = np.std(noise_map)
         
@@ -56,9 +58,9 @@ class NoiseAnalyzer:
     def _calculate_psnr(self, gray: np.ndarray) -> Dict:
         h, w = gray.shape
         
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0, dst=self._buffers.get('blurred', gray.shape, np.uint8))
         
-        mse = np.mean((gray.astype(np.float64) - blurred.astype(np.float64)) ** 2)
+        mse = cv2.norm(gray, blurred, cv2.NORM_L2SQR) / gray.size
         
         if mse == 0:
             psnr = float('inf')
@@ -73,25 +75,48 @@ class NoiseAnalyzer:
         }
     
     def _calculate_ssim(self, gray: np.ndarray) -> Dict:
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        shape = gray.shape
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0, dst=self._buffers.get('blurred', shape, np.uint8))
         
         C1 = (0.01 * 255) ** 2
         C2 = (0.03 * 255) ** 2
         
-        mu1 = cv2.GaussianBlur(gray.astype(np.float64), (11, 11), 1.5)
-        mu2 = cv2.GaussianBlur(blurred.astype(np.float64), (11, 11), 1.5)
-        
-        mu1_sq = mu1 ** 2
-        mu2_sq = mu2 ** 2
-        mu1_mu2 = mu1 * mu2
-        
-        sigma1_sq = cv2.GaussianBlur(gray.astype(np.float64) ** 2, (11, 11), 1.5) - mu1_sq
-        sigma2_sq = cv2.GaussianBlur(blurred.astype(np.float64) ** 2, (11, 11), 1.5) - mu2_sq
-        sigma12 = cv2.GaussianBlur(gray.astype(np.float64) * blurred.astype(np.float64), (11, 11), 1.5) - mu1_mu2
-        
-        ssim_map = ((2 * mu1_mu2 + C1) * (2 * sigma12 + C2)) / ((mu1_sq + mu2_sq + C1) * (sigma1_sq + sigma2_sq + C2))
-        
-        ssim = np.mean(ssim_map)
+        g = self._buffers.get('gray', shape)
+        b = self._buffers.get('blurred_f', shape)
+        np.copyto(g, gray)
+        np.copyto(b, blurred)
+        product = self._buffers.get('product', shape)
+        
+        mu1 = cv2.GaussianBlur(g, (11, 11), 1.5, dst=self._buffers.get('mu1', shape))
+        mu2 = cv2.GaussianBlur(b, (11, 11), 1.5, dst=self._buffers.get('mu2', shape))
+        sigma1_sq = cv2.GaussianBlur(cv2.multiply(g, g, dst=product), (11, 11), 1.5,
+                                     dst=self._buffers.get('sigma1_sq', shape))
+        sigma2_sq = cv2.GaussianBlur(cv2.multiply(b, b, dst=product), (11, 11), 1.5,
+                                     dst=self._buffers.get('sigma2_sq', shape))
+        sigma12 = cv2.GaussianBlur(cv2.multiply(g, b, dst=product), (11, 11), 1.5,
+                                   dst=self._buffers.get('sigma12', shape))
+        
+        mu1_mu2 = cv2.multiply(mu1, mu2, dst=product)
+        mu1 *= mu1
+        mu2 *= mu2
+        sigma1_sq -= mu1
+        sigma2_sq -= mu2
+        sigma12 -= mu1_mu2
+        
+        mu1_mu2 *= 2
+        mu1_mu2 += C1
+        sigma12 *= 2
+        sigma12 += C2
+        mu1_mu2 *= sigma12
+        
+        mu1 += mu2
+        mu1 += C1
+        sigma1_sq += sigma2_sq
+        sigma1_sq += C2
+        mu1 *= sigma1_sq
+        
+        mu1_mu2 /= mu1
+        ssim = mu1_mu2.mean(dtype=np.float64)
         
         return {
             'value': float(ssim),
@@ -101,13 +126,14 @@ class NoiseAnalyzer:
     
     def _calculate_snr(self, gray: np.ndarray) -> Dict:
         edges = cv2.Canny(gray, threshold1=50, threshold2=150)
-        uniform_mask = ~edges.astype(bool)
+        uniform_mask = cv2.bitwise_not(edges)
         
-        if np.sum(uniform_mask) < gray.size * 0.1:
-            uniform_mask = np.ones_like(gray, dtype=bool)
+        if cv2.countNonZero(uniform_mask) < gray.size * 0.1:
+            uniform_mask = None
         
-        signal = np.mean(gray[uniform_mask])
-        noise = np.std(gray[uniform_mask])
+        mean, stddev = cv2.meanStdDev(gray, mask=uniform_mask)
+        signal = mean[0, 0]
+        noise = stddev[0, 0]
         snr = signal / (noise + 1e-6)
         
         return {
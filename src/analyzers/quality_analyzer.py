@@ -1,26 +1,28 @@
 import cv2
 import numpy as np
-from typing import Dict, Tuple
+from typing import Dict, Tuple, Union
+
+from ..utils.image_bundle import ImageBundle
 
 
 class ImageQualityAnalyzer:
     def __init__(self, config: dict):
         self.config = config
         self.thresholds = config.get('analysis', {})
+        self.load_scale = self.thresholds.get('load_scale', 1)
 
-    def analyze(self, image_path: str) -> Dict:
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Failed to load image: {image_path}")
-        
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    def analyze(self, bundle: Union[str, ImageBundle]) -> Dict:
+        bundle = ImageBundle.wrap(bundle, self.load_scale)
+        gray = bundle.gray
+        hist = np.bincount(gray.ravel(), minlength=256)
+        mean_brightness, std_brightness = self._histogram_moments(hist)
         
         results = {
-            'brightness': self._calculate_brightness(image),
-            'contrast': self._calculate_contrast(image),
-            'saturation': self._calculate_saturation(image),
-            'histogram': self._calculate_histogram(image),
-            'tone_analysis': self._analyze_tone(gray)
+            'brightness': self._calculate_brightness(mean_brightness, std_brightness),
+            'contrast': self._calculate_contrast(std_brightness),
+            'saturation': self._calculate_saturation(bundle.hsv),
+            'histogram': self._calculate_histogram(hist),
+            'tone_analysis': self._analyze_tone(hist)
         }
         
         results['brightness']['pass'] = self._check_brightness(results['brightness']['value'])
@@ -30,11 +32,14 @@ class ImageQualityAnalyzer:
         
         return results
 
-    def _calculate_brightness(self, image: np.ndarray) -> Dict:
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        mean_brightness = np.mean(gray)
-        std_brightness = np.std(gray)
-        
+    def _histogram_moments(self, hist: np.ndarray) -> Tuple[float, float]:
+        levels = np.arange(hist.size, dtype=np.float64)
+        total = max(int(hist.sum()), 1)
+        mean = (hist @ levels) / total
+        variance = (hist @ (levels * levels)) / total - mean * mean
+        return mean, np.sqrt(max(variance, 0.0))
+    
+    def _calculate_brightness(self, mean_brightness: float, std_brightness: float) -> Dict:
         return {
             'value': float(mean_brightness),
             'std': float(std_brightness),
@@ -42,20 +47,15 @@ class ImageQualityAnalyzer:
             'description': '图像平均亮度'
         }
     
-    def _calculate_contrast(self, image: np.ndarray) -> Dict:
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        contrast = np.std(gray)
-        
+    def _calculate_contrast(self, contrast: float) -> Dict:
         return {
             'value': float(contrast),
             'unit': '标准差',
             'description': '图像对比度水平'
         }
     
-    def _calculate_saturation(self, image: np.ndarray) -> Dict:
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-        saturation = hsv[:, :, 1]
-        mean_saturation = np.mean(saturation)
+    def _calculate_saturation(self, hsv: np.ndarray) -> Dict:
+        mean_saturation = cv2.mean(hsv)[1]
         
         return {
             'value': float(mean_saturation),
@@ -63,11 +63,7 @@ class ImageQualityAnalyzer:
             'description': '图像平均饱和度'
         }
     
-    def _calculate_histogram(self, image: np.ndarray) -> Dict:
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
-        hist = hist.flatten().tolist()
-        
+    def _calculate_histogram(self, hist: np.ndarray) -> Dict:
         return {
             'values': hist,
             'bins': 256,
@@ -89,9 +85,8 @@ class ImageQualityAnalyzer:
     def _check_saturation(self, value: float) -> bool:
         return value > 50
     
-    def _analyze_tone(self, gray: np.ndarray) -> Dict:
-        hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).flatten()
-        total = gray.size
+    def _analyze_tone(self, hist: np.ndarray) -> Dict:
+        total = hist.sum()
         highlight_ratio = hist[230:].sum() / total
         shadow_ratio = hist[:25].sum() / total
         
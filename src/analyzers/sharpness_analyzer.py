@@ -1,24 +1,31 @@
+import threading
+import weakref
+
 import cv2
 import numpy as np
-from typing import Dict
+from typing import Dict, Union
+
+from ..utils.buffer_pool import BufferPool
+from ..utils.image_bundle import ImageBundle
 
 
 class SharpnessAnalyzer:
     def __init__(self, config: dict):
         self.config = config
         self.thresholds = config.get('analysis', {})
+        self.load_scale = self.thresholds.get('load_scale', 1)
+        self._buffers = BufferPool()
+        self._local = threading.local()
 
-    def analyze(self, image_path: str) -> Dict:
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Failed to load image: {image_path}")
-        
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    def analyze(self, bundle: Union[str, ImageBundle]) -> Dict:
+        bundle = ImageBundle.wrap(bundle, self.load_scale)
+        gray = bundle.gray
+        squared_gradient = self._squared_gradient(gray)
         
         results = {
-            'laplacian': self._laplacian_variance(gray),
-            'sobel': self._sobel_gradient(gray),
-            'tenengrad': self._tenengrad(gray),
+            'laplacian': self._laplacian_variance(self._laplacian(bundle)),
+            'sobel': self._sobel_gradient(squared_gradient),
+            'tenengrad': self._tenengrad(squared_gradient),
             'fft_focus': self._fft_focus(gray)
         }
         
@@ -30,9 +37,20 @@ class SharpnessAnalyzer:
         
         return results
 
-    def _laplacian_variance(self, gray: np.ndarray) -> Dict:
-        laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-        variance = laplacian.var()
+    def _laplacian(self, bundle: ImageBundle) -> np.ndarray:
+        last = getattr(self._local, 'last_laplacian', None)
+        if last is not None:
+            ref, laplacian = last
+            if ref() is bundle:
+                return laplacian
+        
+        gray = bundle.gray
+        laplacian = cv2.Laplacian(gray, cv2.CV_32F, dst=self._buffers.get('laplacian', gray.shape))
+        self._local.last_laplacian = (weakref.ref(bundle), laplacian)
+        return laplacian
+    
+    def _laplacian_variance(self, laplacian: np.ndarray) -> Dict:
+        variance = cv2.meanStdDev(laplacian)[1][0, 0] ** 2
         
         return {
             'value': float(variance),
@@ -40,11 +58,16 @@ class SharpnessAnalyzer:
             'description': '拉普拉斯方差 - 值越高表示图像越清晰'
         }
     
-    def _sobel_gradient(self, gray: np.ndarray) -> Dict:
-        sobel_x = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-        sobel_y = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
-        gradient_magnitude = np.sqrt(sobel_x**2 + sobel_y**2)
-        mean_gradient = np.mean(gradient_magnitude)
+    def _squared_gradient(self, gray: np.ndarray) -> np.ndarray:
+        gx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3, dst=self._buffers.get('gx', gray.shape))
+        gy = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3, dst=self._buffers.get('gy', gray.shape))
+        cv2.multiply(gx, gx, dst=gx)
+        cv2.multiply(gy, gy, dst=gy)
+        return cv2.add(gx, gy, dst=gx)
+    
+    def _sobel_gradient(self, squared_gradient: np.ndarray) -> Dict:
+        gradient_magnitude = cv2.sqrt(squared_gradient)
+        mean_gradient = cv2.mean(gradient_magnitude)[0]
         
         return {
             'value': float(mean_gradient),
@@ -52,10 +75,8 @@ class SharpnessAnalyzer:
             'description': 'Sobel梯度 - 边缘检测清晰度'
         }
     
-    def _tenengrad(self, gray: np.ndarray) -> Dict:
-        gx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-        gy = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
-        tenengrad = np.mean(gx**2 + gy**2)
+    def _tenengrad(self, squared_gradient: np.ndarray) -> Dict:
+        tenengrad = cv2.mean(squared_gradient)[0]
         
         return {
             'value': float(tenengrad),
@@ -64,9 +85,11 @@ class SharpnessAnalyzer:
         }
     
     def _fft_focus(self, gray: np.ndarray) -> Dict:
-        f = np.fft.fft2(gray)
-        fshift = np.fft.fftshift(f)
-        magnitude_spectrum = 20 * np.log(np.abs(fshift) + 1)
+        dft = cv2.dft(gray.astype(np.float32), flags=cv2.DFT_COMPLEX_OUTPUT)
+        magnitude_spectrum = cv2.magnitude(dft[..., 0], dft[..., 1])
+        magnitude_spectrum += 1
+        cv2.log(magnitude_spectrum, magnitude_spectrum)
+        magnitude_spectrum *= 20
         
         rows, cols = gray.shape
         crow, ccol = rows // 2, cols // 2
@@ -74,9 +97,10 @@ class SharpnessAnalyzer:
         mask = np.zeros((rows, cols), np.uint8)
         r = min(rows, cols) // 4
         cv2.circle(mask, (ccol, crow), r, 1, -1)
+        mask = np.fft.ifftshift(mask)
         
-        high_freq = np.sum(magnitude_spectrum * mask)
-        total_freq = np.sum(magnitude_spectrum)
+        high_freq = cv2.sumElems(cv2.multiply(magnitude_spectrum, mask, dtype=cv2.CV_32F))[0]
+        total_freq = magnitude_spectrum.sum(dtype=np.float64)
         
         focus_score = high_freq / (total_freq + 1e-10) * 1000
         
@@ -86,22 +110,14 @@ class SharpnessAnalyzer:
             'description': 'FFT焦点 - 高频内容比例，越高越清晰'
         }
 
-    def detect_blur_regions(self, image_path: str, block_size: int = 64) -> Dict:
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Failed to load image: {image_path}")
-        
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        h, w = gray.shape
-        
-        blur_map = np.zeros((h // block_size, w // block_size))
-        
-        for i in range(0, h, block_size):
-            for j in range(0, w, block_size):
-                block = gray[i:i+block_size, j:j+block_size]
-                if block.shape[0] == block_size and block.shape[1] == block_size:
-                    laplacian = cv2.Laplacian(block, cv2.CV_64F)
-                    blur_map[i//block_size, j//block_size] = laplacian.var()
+    def detect_blur_regions(self, bundle: Union[str, ImageBundle], block_size: int = 64) -> Dict:
+        bundle = ImageBundle.wrap(bundle, self.load_scale)
+        laplacian = self._laplacian(bundle)
+        h, w = laplacian.shape
+        
+        rows, cols = h // block_size, w // block_size
+        blocks = laplacian[:rows * block_size, :cols * block_size].reshape(rows, block_size, cols, block_size)
+        blur_map = blocks.var(axis=(1, 3))
         
         threshold = self.thresholds.get('sharpness_threshold', {}).get('min', 100)
         blurry_blocks = np.sum(blur_map < threshold)
@@ -2,7 +2,7 @@ import os
 import time
 import traceback
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import Iterator, Optional, Tuple
 from .adb_controller import ADBController
 
 
@@ -39,8 +39,9 @@ class CameraController:
                 print(f"  时间: {latest_photo['timestamp']}")
                 print(f"  路径: {latest_photo['path']}")
                 
-                timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-                name = f"photo_{timestamp_str}.jpg"
+                if name is None:
+                    timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    name = f"photo_{timestamp_str}.jpg"
                 local_path = os.path.join(self.output_dir, name)
                 
                 self.adb.pull_file(latest_photo['path'], local_path)
@@ -61,15 +62,15 @@ class CameraController:
                 print("- 检查手机存储权限")
                 print("\n程序将创建空文件以继续，但无法进行分析")
                 
-                timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-                name = f"photo_{timestamp_str}.jpg"
+                if name is None:
+                    timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    name = f"photo_{timestamp_str}.jpg"
                 local_path = os.path.join(self.output_dir, name)
                 
                 return local_path, name
                 
         except Exception as e:
             print(f"\n❌ 错误: {e}")
-            import traceback
             traceback.print_exc()
             raise RuntimeError(f"Failed to capture photo: {e}")
 
@@ -88,40 +89,43 @@ class CameraController:
             raise RuntimeError(f"Failed to capture screenshot: {e}")
 
     def capture_multiple_photos(self, count: int, delay: float = 2.0) -> list:
-        photos = []
+        return list(self.capture_photos_iter(count, delay))
+
+    def capture_photos_iter(self, count: int, delay: float = 2.0) -> Iterator[Tuple[str, str]]:
         print(f"\n将读取 {count} 张照片进行分析")
         print("请确保相册中有足够的照片")
         print("-" * 50)
         
+        captured = 0
         for i in range(count):
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             name = f"photo_{timestamp}_{i+1}.jpg"
             try:
-                path, filename = self.capture_photo(name)
-                photos.append((path, filename))
-                if i < count - 1:
-                    print(f"\n准备读取下一张照片...")
+                photo = self.capture_photo(name)
             except Exception as e:
                 print(f"Failed to capture photo {i+1}: {e}")
+                continue
+            captured += 1
+            yield photo
+            if i < count - 1:
+                print(f"\n准备读取下一张照片...")
         
         print("\n" + "=" * 50)
-        print(f"照片读取完成！共读取 {len(photos)} 张照片")
+        print(f"照片读取完成！共读取 {captured} 张照片")
         print("=" * 50 + "\n")
-        
-        return photos
 
     def get_camera_info(self) -> dict:
         info = {}
         
         try:
-            success, output = self.adb._run_command(['shell', 'dumpsys', 'media.camera'])
+            success, output = self.adb._shell_exec('dumpsys media.camera')
             if success:
                 info['camera_service'] = 'Available'
         except:
             info['camera_service'] = 'Unknown'
         
         try:
-            success, output = self.adb._run_command(['shell', 'pm', 'list', 'packages', 'camera'])
+            success, output = self.adb._shell_exec('pm list packages camera')
             if success:
                 info['camera_apps'] = [line.split(':')[-1] for line in output.strip().split('\n') if line]
         except:
@@ -0,0 +1,39 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import cv2
+
+from .analyzers.quality_analyzer import ImageQualityAnalyzer
+from .analyzers.sharpness_analyzer import SharpnessAnalyzer
+from .analyzers.noise_analyzer import NoiseAnalyzer
+from .analyzers.color_analyzer import ColorAnalyzer
+from .utils.image_bundle import ImageBundle
+
+
+_analyzers: Dict = {}
+_load_scale = 1
+
+
+def _init_worker(config: dict):
+    global _load_scale
+    cv2.setNumThreads(1)
+    _load_scale = config.get('analysis', {}).get('load_scale', 1)
+    _analyzers.update({
+        'quality': ImageQualityAnalyzer(config),
+        'sharpness': SharpnessAnalyzer(config),
+        'noise': NoiseAnalyzer(config),
+        'color': ColorAnalyzer(config)
+    })
+
+
+def analyze_one(image_path: str) -> Tuple[str, Dict]:
+    bundle = ImageBundle(image_path, _load_scale)
+    size = bundle.size
+    return size, {category: analyzer.analyze(bundle) for category, analyzer in _analyzers.items()}
+
+
+def create_analysis_pool(config: dict, max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                               initializer=_init_worker,
+                               initargs=(config,))
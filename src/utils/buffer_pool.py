@@ -0,0 +1,27 @@
+import threading
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+class BufferPool:
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def _buffers(self) -> Dict[str, np.ndarray]:
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        return buffers
+
+    def get(self, name: str, shape: Tuple[int, ...], dtype=np.float32) -> np.ndarray:
+        buffers = self._buffers
+        buffer = buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            buffers[name] = buffer
+        return buffer
+
+    def clear(self):
+        self._buffers.clear()
@@ -0,0 +1,96 @@
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+
+LOAD_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
+
+@dataclass(eq=False)
+class ImageBundle:
+    path: str
+    load_scale: int = 1
+    _image: Optional[np.ndarray] = field(default=None, repr=False)
+    _gray: Optional[np.ndarray] = field(default=None, repr=False)
+    _hsv: Optional[np.ndarray] = field(default=None, repr=False)
+    _lab: Optional[np.ndarray] = field(default=None, repr=False)
+    _scaled: Dict[float, 'ImageBundle'] = field(default_factory=dict, repr=False, compare=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.load_scale not in LOAD_FLAGS:
+            self.load_scale = 1
+
+    @classmethod
+    def wrap(cls, source: Union[str, 'ImageBundle'], load_scale: int = 1) -> 'ImageBundle':
+        if isinstance(source, cls):
+            return source
+        return cls(source, load_scale)
+
+    def _cached(self, name: str, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        value = getattr(self, name)
+        if value is None:
+            with self._lock:
+                value = getattr(self, name)
+                if value is None:
+                    value = compute()
+                    setattr(self, name, value)
+        return value
+
+    def _load(self) -> np.ndarray:
+        image = cv2.imread(self.path, LOAD_FLAGS[self.load_scale])
+        if image is None:
+            raise ValueError(f"Failed to load image: {self.path}")
+        return image
+
+    @property
+    def image(self) -> np.ndarray:
+        return self._cached('_image', self._load)
+
+    @property
+    def gray(self) -> np.ndarray:
+        return self._cached('_gray', lambda: cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY))
+
+    @property
+    def hsv(self) -> np.ndarray:
+        return self._cached('_hsv', lambda: cv2.cvtColor(self.image, cv2.COLOR_BGR2HSV))
+
+    @property
+    def lab(self) -> np.ndarray:
+        return self._cached('_lab', lambda: cv2.cvtColor(self.image, cv2.COLOR_BGR2LAB))
+
+    def scaled(self, scale: float) -> 'ImageBundle':
+        if scale >= 1:
+            return self
+        
+        bundle = self._scaled.get(scale)
+        if bundle is None:
+            with self._lock:
+                bundle = self._scaled.get(scale)
+                if bundle is None:
+                    h, w = self.image.shape[:2]
+                    size = (max(1, round(w * scale)), max(1, round(h * scale)))
+                    image = cv2.resize(self.image, size, interpolation=cv2.INTER_AREA)
+                    bundle = ImageBundle(self.path, _image=image)
+                    self._scaled[scale] = bundle
+        return bundle
+
+    @property
+    def size(self) -> str:
+        h, w = self.image.shape[:2]
+        if self.load_scale > 1:
+            try:
+                with Image.open(self.path) as img:
+                    w, h = img.size
+            except (OSError, ValueError):
+                w, h = w * self.load_scale, h * self.load_scale
+        return f"{w}x{h}"